@@ -1,18 +1,31 @@
 # cms_calc.py
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, ValidationError
 import uvicorn
 import logging
 import os
 from dotenv import load_dotenv
-import requests
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
-from typing import Optional, Dict, Any
+import asyncio
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import httpx
+import jellyfish
+import orjson
+import redis.asyncio as redis
+from typing import Optional, Dict, Any, Callable, Hashable, List, Mapping, Tuple
+from bisect import bisect_left
 from uuid import uuid4
-import smtplib
+import aiosmtplib
+# CMS client and retry policy are shared with the apps under src/
+from src.cms_http import build_cms_client, cms_get
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
@@ -26,8 +39,82 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+# A line per request on /api/physician is measurable overhead; errors are still logged
+logging.getLogger("uvicorn.access").disabled = True
+
+# Calculations only need to outlive the HubSpot form round trip
+CALCULATION_TTL_SECONDS = 24 * 60 * 60
+
+# HubSpot webhook bodies are a few hundred bytes; anything near this is not HubSpot
+WEBHOOK_MAX_BODY_BYTES = 64 * 1024
+
+# CMS physician data is refreshed yearly, so lookups can be cached for a while;
+# misses are kept for less time so a corrected typo is retried soon
+PHYSICIAN_CACHE_TTL_SECONDS = 60 * 60
+PHYSICIAN_MISS_TTL_SECONDS = 5 * 60
+PHYSICIAN_CACHE_SIZE = 10_000
+# The same providers come back in lookup after lookup, so keep their built results
+RESULT_CACHE_SIZE = 100_000
+# One last name can bring back 5000 providers, so indexes are bounded by the rows they hold
+NAME_INDEX_CACHE_ROWS = 100_000
+# CMS rows carry around 80 columns; only the ones a lookup result is built from are kept
+ROW_FIELDS = (
+    'Rndrng_NPI',
+    'Rndrng_Prvdr_First_Name',
+    'Rndrng_Prvdr_Last_Org_Name',
+    'Rndrng_Prvdr_State_Abrvtn',
+    'Tot_Benes',
+    'Tot_Mdcr_Alowd_Amt'
+)
+# Redis copy of lookups, shared by every worker and kept across restarts
+SHARED_CACHE_TTL_SECONDS = 24 * 60 * 60
+SHARED_MISS_TTL_SECONDS = 5 * 60
+
+CMS_DATASET_URL = "https://data.cms.gov/data-api/v1/dataset/8889d81e-2ee7-448f-8713-f071038289b5/data"
+# Holding the whole dataset (around a million providers) takes a few GB per worker,
+# so serving lookups from memory is opt-in
+PRELOAD_CMS_DATASET = os.getenv("PRELOAD_CMS_DATASET") == "1"
+PRELOAD_PAGE_SIZE = 5000
+# CMS publishes yearly, so a daily reload is plenty; a failed load is retried sooner
+PRELOAD_REFRESH_SECONDS = 24 * 60 * 60
+PRELOAD_RETRY_SECONDS = 10 * 60
+# Largest edit distance at which a same-sounding last name still counts ("Smyth" for "Smith")
+FUZZY_MAX_DISTANCE = 2
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Thread pool used by asyncio.to_thread for PDF rendering
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=16))
+
+    # One pooled HTTP/2 client per worker; connections to data.cms.gov are reused across requests
+    app.state.http = build_cms_client()
+    # Calculation data lives in Redis so every worker can see it
+    app.state.redis = redis.Redis.from_url(
+        os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+        max_connections=50
+    )
+    # Built here rather than at import so its queue belongs to the running loop;
+    # one connection is opened up front so the first report skips the TLS handshake
+    app.state.smtp = SmtpPool(
+        host=os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+        port=int(os.getenv("SMTP_PORT", "587")),
+        username=os.getenv("SMTP_USERNAME"),
+        password=os.getenv("SMTP_PASSWORD")
+    )
+    await app.state.smtp.warm_up()
+    # Lookups go to the CMS API until the first load finishes
+    app.state.physician_index = None
+    refresh_task = asyncio.create_task(_refresh_physician_index()) if PRELOAD_CMS_DATASET else None
 
-app = FastAPI()
+    yield
+
+    if refresh_task is not None:
+        refresh_task.cancel()
+    await app.state.http.aclose()
+    await app.state.redis.aclose()
+    await app.state.smtp.close()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -38,27 +125,170 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory storage for calculation data; replace with a database in production
-calculation_data_store = {}
-
 # Models
 class PhysicianRequest(BaseModel):
     search_term: str
     state: Optional[str] = None
     search_type: str = "name"
 
-class ReportRequest(BaseModel):
-    email: str
-    calc_id: str
+_MISSING = object()
+
+class TTLCache:
+    """
+    LRU cache with a per-entry expiry time; maxsize bounds the summed weight
+    of the entries, which is their count unless a weigh function is given
+    """
+    def __init__(self, maxsize: int, weigh: Optional[Callable[[Any], int]] = None):
+        self.maxsize = maxsize
+        self._weigh = weigh
+        self._weight = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = _MISSING) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value, weight = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self._weight -= weight
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._weight -= old[2]
+        weight = self._weigh(value) if self._weigh else 1
+        self._entries[key] = (time.monotonic() + ttl, value, weight)
+        self._weight += weight
+        while self._weight > self.maxsize and len(self._entries) > 1:
+            self._weight -= self._entries.popitem(last=False)[1][2]
+
+class NameIndex:
+    """
+    CMS rows for a last-name query, indexed by (last, first) name
+    """
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self._by_name: Dict[tuple, Dict[str, Any]] = {}
+        self._first_in_order: Dict[str, Dict[str, Any]] = {}
+        first_names: Dict[str, List[str]] = {}
+        for row in rows:
+            last = row['Rndrng_Prvdr_Last_Org_Name'].casefold()
+            first = row['Rndrng_Prvdr_First_Name'].casefold()
+            self._first_in_order.setdefault(last, row)
+            if (last, first) not in self._by_name:
+                self._by_name[(last, first)] = row
+                first_names.setdefault(last, []).append(first)
+        # Sorted per last name so a first-name prefix is a single bisect
+        self._first_names = {last: sorted(names) for last, names in first_names.items()}
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def find(self, last_name: str, first_name: str = "") -> Optional[Dict[str, Any]]:
+        last = last_name.casefold()
+        if not first_name:
+            return self._first_in_order.get(last)
+
+        first = first_name.casefold()
+        row = self._by_name.get((last, first))
+        if row is not None:
+            return row
+
+        names = self._first_names.get(last, [])
+        i = bisect_left(names, first)
+        if i < len(names) and names[i].startswith(first):
+            return self._by_name[(last, names[i])]
+        return None
+
+class PhysicianIndex:
+    """
+    The full CMS dataset held in memory, indexed by NPI and by last name
+    """
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self._by_npi: Dict[str, Dict[str, Any]] = {}
+        self._by_last: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            self._by_npi.setdefault(row['Rndrng_NPI'], row)
+            self._by_last.setdefault(row['Rndrng_Prvdr_Last_Org_Name'].casefold(), []).append(row)
+        # Last names bucketed by how they sound, so a misspelling only has to be
+        # compared against the handful of names that could be meant
+        self._by_sound: Dict[str, List[str]] = {}
+        for last in self._by_last:
+            self._by_sound.setdefault(jellyfish.metaphone(last), []).append(last)
+        # Name indexes are built on first use per (last name, state), like the API-backed ones
+        self._name_indexes = TTLCache(NAME_INDEX_CACHE_ROWS, weigh=len)
+
+    def __len__(self) -> int:
+        return len(self._by_npi)
+
+    def find_npi(self, npi: str, state: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        row = self._by_npi.get(npi)
+        if row is None or (state and row.get('Rndrng_Prvdr_State_Abrvtn', '').upper() != state.upper()):
+            return None
+        return row
+
+    def find_name(self, last_name: str, first_name: str = "", state: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        last = last_name.casefold()
+        state = state.upper() if state else None
+        row = self._find_exact(last, first_name, state)
+        if row is not None:
+            return row
+
+        # No provider under this exact last name; try the closest names that sound like it
+        candidates = []
+        for name in self._by_sound.get(jellyfish.metaphone(last), []):
+            if name != last:
+                distance = jellyfish.damerau_levenshtein_distance(last, name)
+                if distance <= FUZZY_MAX_DISTANCE:
+                    candidates.append((distance, name))
+        for _, name in sorted(candidates):
+            row = self._find_exact(name, first_name, state)
+            if row is not None:
+                return row
+        return None
+
+    def _find_exact(self, last: str, first_name: str, state: Optional[str]) -> Optional[Dict[str, Any]]:
+        index = self._name_indexes.get((last, state))
+        if index is _MISSING:
+            rows = self._by_last.get(last, [])
+            if state:
+                rows = [row for row in rows if row.get('Rndrng_Prvdr_State_Abrvtn', '').upper() == state]
+            index = NameIndex(rows)
+            self._name_indexes.set((last, state), index, PRELOAD_REFRESH_SECONDS)
+        return index.find(last, first_name)
+
+physician_cache = TTLCache(PHYSICIAN_CACHE_SIZE)
+name_index_cache = TTLCache(NAME_INDEX_CACHE_ROWS, weigh=len)
+
+# Lookups currently waiting on CMS, so concurrent identical searches share one round trip
+_pending_lookups: Dict[Hashable, asyncio.Task] = {}
+
+class Provider(BaseModel):
+    name: str
+    npi: str
+    totalPatients: int
+
+class CalculationPayload(BaseModel):
+    providers: List[Provider]
+    totalPatients: int
+    enrolledPatients: int
+    annualRevenue: float
+    annualProfit: float
+    notFoundNPIs: List[str] = []
+
+class HubspotWebhook(BaseModel):
+    email: str = Field(min_length=1)
+    calc_id: str = Field(min_length=1)
 
 @app.post("/api/physician")
 async def search_physician(request: PhysicianRequest):
     try:
-        logger.info(f"Searching by {request.search_type}: {request.search_term}")
-        api_url = "https://data.cms.gov/data-api/v1/dataset/8889d81e-2ee7-448f-8713-f071038289b5/data"
-
-        result = fetch_physician_data(
-            api_url=api_url,
+        logger.debug("Searching by %s: %s", request.search_type, request.search_term)
+        result = await fetch_physician_data(
+            api_url=CMS_DATASET_URL,
             physician_name=request.search_term,
             search_type=request.search_type,
             state=request.state
@@ -70,202 +300,399 @@ async def search_physician(request: PhysicianRequest):
                 detail=f"No physician found with {request.search_type} '{request.search_term}'"
             )
 
-        return result
+        # Serialized straight to orjson, skipping FastAPI's jsonable_encoder pass;
+        # copied because cached results are read-only mappings orjson can't encode
+        return ORJSONResponse(dict(result))
     except Exception as e:
         logger.error(f"Error occurred: {str(e)}")
         if isinstance(e, HTTPException):
             raise
         raise HTTPException(status_code=500, detail=str(e))
 
-def fetch_physician_data(
+async def fetch_physician_data(
     api_url: str,
     physician_name: str,
     search_type: str = "name",
     state: Optional[str] = None
 ) -> Optional[Dict[str, Any]]:
     """
-    Fetch physician data from CMS API
+    Fetch physician data from CMS API, serving repeated searches from the cache
     """
-    # Setup retry strategy
-    retry_strategy = Retry(
-        total=3,  # number of retries
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["HEAD", "GET", "OPTIONS"]
-    )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session = requests.Session()
-    session.mount("https://", adapter)
-    session.mount("http://", adapter)
+    index = app.state.physician_index
+    if index is not None:
+        # The whole dataset is in memory, so its answer is final either way
+        if search_type == "npi":
+            row = index.find_npi(physician_name, state)
+        else:
+            first_name, last_name = _split_name(physician_name)
+            row = index.find_name(last_name, first_name, state)
+        return _row_to_result(*_result_args(row)) if row is not None else None
+
+    key = (search_type, " ".join(physician_name.casefold().split()), state.upper() if state else None)
+    result = physician_cache.get(key)
+    if result is not _MISSING:
+        return result
+
+    task = _pending_lookups.get(key)
+    if task is None:
+        task = asyncio.create_task(_lookup_physician_data(key, api_url, physician_name, search_type, state))
+        _pending_lookups[key] = task
+        task.add_done_callback(lambda done: _finish_lookup(key, done))
+    # Shielded so one caller disconnecting does not cancel the lookup for the others
+    return await asyncio.shield(task)
+
+def _finish_lookup(key: Hashable, task: asyncio.Task):
+    del _pending_lookups[key]
+    if task.cancelled() or task.exception() is not None:
+        return
+    result = task.result()
+    ttl = PHYSICIAN_CACHE_TTL_SECONDS if result is not None else PHYSICIAN_MISS_TTL_SECONDS
+    physician_cache.set(key, result, ttl)
+
+async def _lookup_physician_data(
+    key: tuple,
+    api_url: str,
+    physician_name: str,
+    search_type: str,
+    state: Optional[str]
+) -> Optional[Dict[str, Any]]:
+    """
+    Check the Redis cache shared by all workers before going to CMS
+    """
+    # key is (search_type, term, state)
+    redis_key = "cms:" + ":".join(part or "*" for part in key)
+    try:
+        cached = await app.state.redis.get(redis_key)
+        if cached is not None:
+            return orjson.loads(cached)
+    except redis.RedisError as e:
+        # The cache is an optimisation; fall through to CMS if Redis is unavailable
+        logger.warning(f"Redis cache read failed: {str(e)}")
+
+    result = await _query_physician_data(api_url, physician_name, search_type, state)
 
+    ttl = SHARED_CACHE_TTL_SECONDS if result is not None else SHARED_MISS_TTL_SECONDS
+    try:
+        await app.state.redis.set(redis_key, orjson.dumps(result, default=dict), ex=ttl)
+    except redis.RedisError as e:
+        logger.warning(f"Redis cache write failed: {str(e)}")
+    return result
+
+async def _query_physician_data(
+    api_url: str,
+    physician_name: str,
+    search_type: str,
+    state: Optional[str]
+) -> Optional[Dict[str, Any]]:
     try:
         if search_type == "npi":
             # Direct NPI lookup
-            logger.info(f"Making API request for NPI: {physician_name}")
+            logger.debug("Making API request for NPI: %s", physician_name)
             params = {
                 'filter[Rndrng_NPI]': physician_name,
                 'size': 1  # We only need one result for NPI
             }
-        else:
-            # Name-based search
-            name_parts = physician_name.split(maxsplit=1)
-            if len(name_parts) == 2:
-                first_name, last_name = name_parts
-            else:
-                last_name = name_parts[0]
-                first_name = ""
-
-            logger.info(f"Making API request for name: {first_name} {last_name}")
-            params = {
-                'filter[Rndrng_Prvdr_Last_Org_Name]': last_name,
-                'size': 5000
-            }
+            if state:
+                params['filter[Rndrng_Prvdr_State_Abrvtn]'] = state.upper()
+
+            data = await _fetch_rows(api_url, params)
+            return _row_to_result(*_result_args(data[0])) if data else None
 
-        # Add state filter if provided
+        # Name-based search
+        first_name, last_name = _split_name(physician_name)
+
+        logger.debug("Making API request for name: %s %s", first_name, last_name)
+        params = {
+            'filter[Rndrng_Prvdr_Last_Org_Name]': last_name,
+            'size': 5000
+        }
         if state:
             params['filter[Rndrng_Prvdr_State_Abrvtn]'] = state.upper()
 
-        # Make API request
-        response = session.get(
-            api_url,
-            params=params,
-            timeout=30
-        )
-        response.raise_for_status()
+        # An earlier search for this last name may have indexed everyone with it already
+        index_key = (last_name.casefold(), state.upper() if state else None)
+        index = name_index_cache.get(index_key)
+        result = index.find(last_name, first_name) if index is not _MISSING else None
 
-        data = response.json()
-        logger.info(f"Received {len(data)} results from API")
+        if result is None and first_name:
+            # Let CMS narrow to the exact first name instead of shipping every provider with this
+            # last name; this also covers providers past the 5000 rows a cached index holds
+            data = await _fetch_rows(api_url, {**params, 'filter[Rndrng_Prvdr_First_Name]': first_name, 'size': 50})
+            result = NameIndex(data).find(last_name, first_name)
 
-        if not data:
-            logger.info("No results found")
-            return None
+        if result is None and index is _MISSING:
+            # No exact first-name match (e.g. "Jon" for "JONATHAN"), so search everyone with this
+            # last name and cache the index for the next first name
+            index = NameIndex(await _fetch_rows(api_url, params))
+            name_index_cache.set(index_key, index, PHYSICIAN_CACHE_TTL_SECONDS)
+            result = index.find(last_name, first_name)
 
-        # For NPI search, return first match
-        if search_type == "npi":
-            if data:
-                result = data[0]
-                return {
-                    'name': f"{result['Rndrng_Prvdr_First_Name']} {result['Rndrng_Prvdr_Last_Org_Name']}",
-                    'Tot_Benes': int(result.get('Tot_Benes', 0)),
-                    'Tot_Mdcr_Alowd_Amt': float(result.get('Tot_Mdcr_Alowd_Amt', 0)),
-                    'NPI': result.get('Rndrng_NPI'),
-                    'State': result.get('Rndrng_Prvdr_State_Abrvtn')
-                }
+        if result is None:
+            logger.debug("No exact matches found")
             return None
 
-        # For name search, look for exact match
-        for result in data:
-            if search_type == "name":
-                if (result['Rndrng_Prvdr_Last_Org_Name'].lower() == last_name.lower() and
-                    (not first_name or result['Rndrng_Prvdr_First_Name'].lower().startswith(first_name.lower()))):
-
-                    logger.info(f"Found match: {result['Rndrng_Prvdr_First_Name']} {result['Rndrng_Prvdr_Last_Org_Name']}")
-                    return {
-                        'name': f"{result['Rndrng_Prvdr_First_Name']} {result['Rndrng_Prvdr_Last_Org_Name']}",
-                        'Tot_Benes': int(result.get('Tot_Benes', 0)),
-                        'Tot_Mdcr_Alowd_Amt': float(result.get('Tot_Mdcr_Alowd_Amt', 0)),
-                        'NPI': result.get('Rndrng_NPI'),
-                        'State': result.get('Rndrng_Prvdr_State_Abrvtn')
-                    }
-
-        logger.info("No exact matches found")
-        return None
+        logger.debug("Found match: %s %s", result['Rndrng_Prvdr_First_Name'], result['Rndrng_Prvdr_Last_Org_Name'])
+        return _row_to_result(*_result_args(result))
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"API request failed: {str(e)}")
         raise
     except Exception as e:
         logger.error(f"Error processing physician data: {str(e)}")
         raise
 
+def _split_name(physician_name: str) -> Tuple[str, str]:
+    name_parts = physician_name.split(maxsplit=1)
+    if len(name_parts) == 2:
+        return name_parts[0], name_parts[1]
+    return "", name_parts[0]
+
+async def load_physician_index(api_url: str) -> PhysicianIndex:
+    """
+    Page through the whole CMS dataset and index it in memory
+    """
+    rows: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        page = await _fetch_rows(api_url, {'size': PRELOAD_PAGE_SIZE, 'offset': offset})
+        rows.extend(page)
+        if len(page) < PRELOAD_PAGE_SIZE:
+            break
+        offset += PRELOAD_PAGE_SIZE
+    # Indexing a million rows takes long enough to stall requests, so keep it off the loop
+    return await asyncio.to_thread(PhysicianIndex, rows)
+
+async def _refresh_physician_index():
+    while True:
+        try:
+            started = time.monotonic()
+            index = await load_physician_index(CMS_DATASET_URL)
+            app.state.physician_index = index
+            logger.info("Loaded %d CMS providers in %.0fs", len(index), time.monotonic() - started)
+            delay = PRELOAD_REFRESH_SECONDS
+        except Exception as e:
+            # Keep serving from the previous index (or the API) until the next attempt
+            logger.error(f"Loading CMS dataset failed: {str(e)}")
+            delay = PRELOAD_RETRY_SECONDS
+        await asyncio.sleep(delay)
+
+async def _fetch_rows(api_url: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    response = await cms_get(app.state.http, api_url, params)
+    data = orjson.loads(response.content)
+    logger.debug("Received %d results from API", len(data))
+    # Rows are kept in caches and indexes, so drop the columns nothing reads
+    return [{field: row[field] for field in ROW_FIELDS if field in row} for row in data]
+
+def _result_args(result: Dict[str, Any]) -> Tuple:
+    return (
+        result.get('Rndrng_NPI'),
+        result['Rndrng_Prvdr_First_Name'],
+        result['Rndrng_Prvdr_Last_Org_Name'],
+        result.get('Tot_Benes', 0),
+        result.get('Tot_Mdcr_Alowd_Amt', 0),
+        result.get('Rndrng_Prvdr_State_Abrvtn')
+    )
+
+@lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _row_to_result(npi, first, last, benes, amt, state) -> Mapping[str, Any]:
+    # Read-only because every caller that hits the same row gets the same object
+    return MappingProxyType({
+        'name': f"{first} {last}",
+        'Tot_Benes': int(benes),
+        'Tot_Mdcr_Alowd_Amt': float(amt),
+        'NPI': npi,
+        'State': state
+    })
+
 @app.post("/api/store-calculation")
-async def store_calculation(data: dict):
+async def store_calculation(data: CalculationPayload):
     calc_id = str(uuid4())
-    calculation_data_store[calc_id] = data
+    await app.state.redis.set(f"calc:{calc_id}", data.model_dump_json(), ex=CALCULATION_TTL_SECONDS)
     return {"calc_id": calc_id}
 
 @app.post("/api/hubspot-webhook")
-async def hubspot_webhook(request: Request):
+async def hubspot_webhook(request: Request, background: BackgroundTasks):
+    # Read and validate by hand so oversized bodies are rejected before any parsing
+    raw_body = await _read_body(request, WEBHOOK_MAX_BODY_BYTES)
     try:
-        data = await request.json()
-        email = data.get('email')
-        calc_id = data.get('calc_id')
-
-        if not email or not calc_id:
-            logger.error('Missing email or calc_id in webhook data.')
-            raise HTTPException(status_code=400, detail='Missing email or calc_id.')
+        body = HubspotWebhook.model_validate_json(raw_body)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, 'loc': ('body', *error['loc'])} for error in e.errors()])
 
+    try:
         # Retrieve calculation data
-        calculation_results = calculation_data_store.get(calc_id)
+        raw = await app.state.redis.get(f"calc:{body.calc_id}")
+        calculation_results = orjson.loads(raw) if raw else None
 
         if not calculation_results:
             logger.error('Calculation data not found for calc_id.')
             raise HTTPException(status_code=404, detail='Calculation data not found.')
 
-        # Generate PDF report
-        pdf_report = generate_pdf_report(calculation_results)
+        # Acknowledge HubSpot right away; the report is built and mailed after the response
+        background.add_task(_render_and_send, body.email, calculation_results)
+
+        return {"status": "queued"}
+    except Exception as e:
+        logger.error(f"Error sending report: {str(e)}")
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    content_length = request.headers.get("content-length")
+    if content_length is not None and (not content_length.isdigit() or int(content_length) > limit):
+        raise HTTPException(status_code=413, detail="Request body too large.")
+
+    # Content-Length can be absent (chunked uploads), so count the bytes as they arrive too
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise HTTPException(status_code=413, detail="Request body too large.")
+    return bytes(body)
+
+async def _render_and_send(email: str, calculation_results: Dict[str, Any]):
+    try:
+        # Generate PDF report off the event loop
+        pdf_report = await asyncio.to_thread(generate_pdf_report, calculation_results)
 
         # Send email with the report attached
-        send_email_with_attachment(
+        await send_email_with_attachment(
             recipient=email,
             subject="Your CCM Financial Pro Forma",
             body="Please find your detailed pro forma report attached.",
             attachment=pdf_report,
             attachment_filename="Pro_Forma_Report.pdf"
         )
-
-        return {"message": "Report sent successfully"}
     except Exception as e:
-        logger.error(f"Error sending report: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        # Nobody is waiting on the response any more, so the log is the only record
+        logger.error(f"Error sending report to {email}: {str(e)}")
+
+# Summary lines for the report, filled in with str.format_map
+REPORT_SUMMARY_LINES = (
+    "Total Medicare Patients: {totalPatients:,}",
+    "CCM-Eligible Patients (80%): {eligiblePatients:,}",
+    "Expected Enrollment (50% of eligible): {enrolledPatients:,}",
+    "",
+    "Total Annual Revenue: ${annualRevenue:,.2f}",
+    "Projected Annual Profit: ${annualProfit:,.2f}",
+)
 
 def generate_pdf_report(calculation_results):
-    # Implement PDF generation logic here
-    # For simplicity, we'll create a basic PDF using reportlab
+    # Build the report as Platypus flowables and let reportlab lay out the pages
+    from reportlab.lib import colors
     from reportlab.lib.pagesizes import letter
-    from reportlab.pdfgen import canvas
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, Spacer
     from io import BytesIO
+    from xml.sax.saxutils import escape
+
+    styles = getSampleStyleSheet()
+    story = [
+        Paragraph("CCM Financial Pro Forma Report", styles['Title']),
+        Paragraph("Providers Found:", styles['Heading2']),
+    ]
+
+    providers = [["Provider", "NPI", "Patients"]]
+    providers.extend(
+        [provider['name'], provider['npi'], f"{provider['totalPatients']:,}"]
+        for provider in calculation_results['providers']
+    )
+    table = Table(providers, colWidths=[250, 120, 90], repeatRows=1)
+    table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
+        ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
+    ]))
+    story.append(table)
 
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-
-    textobject = c.beginText(50, height - 50)
-    textobject.setFont("Helvetica", 12)
-
-    textobject.textLine("CCM Financial Pro Forma Report")
-    textobject.textLine("")
+    if calculation_results.get('notFoundNPIs'):
+        story.append(Paragraph("NPIs Not Found:", styles['Heading2']))
+        # Entries are whatever the user typed, and Paragraph would parse them as markup
+        story.extend(Paragraph(f"- {escape(npi)}", styles['Normal']) for npi in calculation_results['notFoundNPIs'])
 
-    textobject.textLine("Providers Found:")
-    for provider in calculation_results['providers']:
-        textobject.textLine(f"- {provider['name']} (NPI: {provider['npi']}) - Patients: {provider['totalPatients']:,}")
+    story.append(Spacer(1, 12))
+    values = {**calculation_results, 'eligiblePatients': int(calculation_results['totalPatients'] * 0.8)}
+    for line in REPORT_SUMMARY_LINES:
+        story.append(Paragraph(line.format_map(values), styles['Normal']) if line else Spacer(1, 12))
 
-    if calculation_results.get('notFoundNPIs'):
-        textobject.textLine("")
-        textobject.textLine("NPIs Not Found:")
-        for npi in calculation_results['notFoundNPIs']:
-            textobject.textLine(f"- {npi}")
-
-    textobject.textLine("")
-    textobject.textLine(f"Total Medicare Patients: {calculation_results['totalPatients']:,}")
-    textobject.textLine(f"CCM-Eligible Patients (80%): {int(calculation_results['totalPatients'] * 0.8):,}")
-    textobject.textLine(f"Expected Enrollment (50% of eligible): {calculation_results['enrolledPatients']:,}")
-    textobject.textLine("")
-    textobject.textLine(f"Total Annual Revenue: ${calculation_results['annualRevenue']:,.2f}")
-    textobject.textLine(f"Projected Annual Profit: ${calculation_results['annualProfit']:,.2f}")
-
-    c.drawText(textobject)
-    c.showPage()
-    c.save()
+    buffer = BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter).build(story)
 
     pdf_value = buffer.getvalue()
     buffer.close()
     return pdf_value
 
-def send_email_with_attachment(recipient, subject, body, attachment, attachment_filename):
-    smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-    smtp_port = int(os.getenv("SMTP_PORT", "587"))
-    smtp_username = os.getenv("SMTP_USERNAME")
-    smtp_password = os.getenv("SMTP_PASSWORD")
+class SmtpPool:
+    """
+    Authenticated SMTP connections kept open and reused across reports
+    """
+    def __init__(self, host: str, port: int, username: Optional[str], password: Optional[str], size: int = 4):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        # One slot per connection; None means the slot has not connected yet
+        self._idle: "asyncio.LifoQueue[Optional[aiosmtplib.SMTP]]" = asyncio.LifoQueue()
+        for _ in range(size):
+            self._idle.put_nowait(None)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        logger.info("Connecting to SMTP server...")
+        server = aiosmtplib.SMTP(hostname=self.host, port=self.port, start_tls=True, timeout=30)
+        try:
+            await server.connect()
+            logger.info("Logging into SMTP server...")
+            await server.login(self.username, self.password)
+        except Exception:
+            # Nothing will reuse a connection that never authenticated
+            server.close()
+            raise
+        return server
+
+    async def warm_up(self):
+        server = await self._idle.get()
+        try:
+            server = await self._connect()
+        except Exception as e:
+            # Not fatal; the first report will try again
+            logger.warning(f"Could not connect to SMTP server at startup: {str(e)}")
+        finally:
+            self._idle.put_nowait(server)
+
+    async def send(self, sender: str, recipients: List[str], message: bytes):
+        # Waits until a connection is free, so at most `size` sends run at once
+        server = await self._idle.get()
+        try:
+            if server is None or not server.is_connected:
+                server = await self._connect()
+            logger.info("Sending email...")
+            try:
+                await server.sendmail(sender, recipients, message)
+            except aiosmtplib.SMTPServerDisconnected:
+                # Idle connections get dropped by the server; reconnect and retry once
+                server.close()
+                server = await self._connect()
+                await server.sendmail(sender, recipients, message)
+        except Exception:
+            # Don't hand a connection in an unknown state to the next report
+            if server is not None:
+                server.close()
+            server = None
+            raise
+        finally:
+            self._idle.put_nowait(server)
+
+    async def close(self):
+        while not self._idle.empty():
+            server = self._idle.get_nowait()
+            if server is not None and server.is_connected:
+                try:
+                    await server.quit()
+                except aiosmtplib.SMTPException:
+                    server.close()
+
+async def send_email_with_attachment(recipient, subject, body, attachment, attachment_filename):
     sender_email = os.getenv("SENDER_EMAIL")
 
     msg = MIMEMultipart()
@@ -279,19 +706,28 @@ def send_email_with_attachment(recipient, subject, body, attachment, attachment_
     part['Content-Disposition'] = f'attachment; filename="{attachment_filename}"'
     msg.attach(part)
 
+    # Flattened once; a retry after a dropped connection resends the same bytes
+    message = msg.as_bytes()
+
     try:
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            logger.info("Connecting to SMTP server...")
-            server.starttls()
-            logger.info("Logging into SMTP server...")
-            server.login(smtp_username, smtp_password)
-            logger.info("Sending email...")
-            server.send_message(msg)
-            logger.info("Email sent successfully!")
+        await app.state.smtp.send(sender_email, [recipient], message)
+        logger.info("Email sent successfully!")
     except Exception as e:
         logger.error(f"SMTP Error: {str(e)}")
         raise
 
 if __name__ == "__main__":
     logger.info("Starting server...")
-    uvicorn.run("cms_calc:app", host="0.0.0.0", port=8000, reload=True)
+    # Hot reload only runs a single process, so dev gets one worker and
+    # production one event loop per core; lifespan resources are per worker
+    dev = os.getenv("ENV") == "dev"
+    uvicorn.run(
+        "cms_calc:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=1 if dev else int(os.getenv("WEB_CONCURRENCY", os.cpu_count())),
+        reload=dev,
+        access_log=False
+    )
@@ -0,0 +1,15 @@
+# gunicorn_conf.py
+
+import os
+
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# 2n+1 workers; each has its own event loop and GIL, so PDF rendering on one
+# worker does not hold up CMS lookups on the others
+workers = int(os.getenv("WEB_CONCURRENCY", 2 * os.cpu_count() + 1))
+
+keepalive = 30
+timeout = 60
+
+# Access logging is disabled for throughput; errors still go to stderr
+accesslog = None
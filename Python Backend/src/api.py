@@ -1,12 +1,14 @@
 import os
-import requests
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 import uvicorn
 import logging
+from contextlib import asynccontextmanager
 from typing import Optional
 from physician_data import fetch_physician_data
+from cms_http import build_cms_client
 
 # Set up logging
 logging.basicConfig(
@@ -15,7 +17,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One CMS client per worker, shared by every request it serves
+    app.state.http = build_cms_client()
+    yield
+    await app.state.http.aclose()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -38,10 +47,11 @@ async def home():
 @app.post("/api/physician")
 async def search_physician(request: PhysicianRequest):
     try:
-        logger.info(f"Searching by {request.search_type}: {request.search_term} (State: {request.state})")
+        logger.debug("Searching by %s: %s (State: %s)", request.search_type, request.search_term, request.state)
         api_url = "https://data.cms.gov/data-api/v1/dataset/8889d81e-2ee7-448f-8713-f071038289b5/data"
         
-        result = fetch_physician_data(
+        result = await fetch_physician_data(
+            client=app.state.http,
             api_url=api_url,
             physician_name=request.search_term,
             state=request.state,
@@ -55,7 +65,7 @@ async def search_physician(request: PhysicianRequest):
             )
             raise HTTPException(status_code=404, detail=message)
             
-        return result
+        return ORJSONResponse(dict(result))
     except Exception as e:
         logger.error(f"Error occurred: {str(e)}", exc_info=True)
         if isinstance(e, HTTPException):
@@ -63,4 +73,13 @@ async def search_physician(request: PhysicianRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 8000)))
\ No newline at end of file
+    dev = os.getenv("ENV") == "dev"
+    uvicorn.run(
+        "api:app",
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", 8000)),
+        loop="uvloop",
+        http="httptools",
+        workers=1 if dev else int(os.getenv("WEB_CONCURRENCY", os.cpu_count())),
+        reload=dev
+    )
\ No newline at end of file
@@ -1,10 +1,13 @@
 import os
-import requests
+from cms_http import build_cms_client, cms_get
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 import uvicorn
+import orjson
 import logging
+from contextlib import asynccontextmanager
 from typing import Optional, Dict, Any
 
 # Set up logging
@@ -14,7 +17,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One CMS client per worker, shared by every request it serves
+    app.state.http = build_cms_client()
+    yield
+    await app.state.http.aclose()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -29,7 +39,7 @@ class PhysicianRequest(BaseModel):
     state: Optional[str] = None
     search_type: str = "name"
 
-def fetch_physician_data(
+async def fetch_physician_data(
     api_url: str,
     physician_name: str,
     search_type: str = "name",
@@ -37,7 +47,7 @@ def fetch_physician_data(
 ) -> Optional[Dict[str, Any]]:
     try:
         if search_type == "npi":
-            logger.info(f"Making API request for NPI: {physician_name}")
+            logger.debug("Making API request for NPI: %s", physician_name)
             params = {
                 "filter[Rndrng_NPI]": physician_name,
                 "size": 1
@@ -54,18 +64,16 @@ def fetch_physician_data(
                 "filter[Rndrng_Prvdr_Last_Org_Name]": last_name,
                 "size": 5000
             }
+            if first_name:
+                params["filter[Rndrng_Prvdr_First_Name]"] = first_name
+                params["size"] = 50
 
         if state:
             params["filter[Rndrng_Prvdr_State_Abrvtn]"] = state.upper()
 
-        response = requests.get(
-            api_url,
-            params=params,
-            timeout=30
-        )
-        response.raise_for_status()
+        response = await cms_get(app.state.http, api_url, params)
 
-        data = response.json()
+        data = orjson.loads(response.content)
         
         if not data:
             return None
@@ -93,10 +101,10 @@ async def home():
 @app.post("/api/physician")
 async def search_physician(request: PhysicianRequest):
     try:
-        logger.info(f"Searching by {request.search_type}: {request.search_term}")
+        logger.debug("Searching by %s: %s", request.search_type, request.search_term)
         api_url = "https://data.cms.gov/data-api/v1/dataset/8889d81e-2ee7-448f-8713-f071038289b5/data"
         
-        result = fetch_physician_data(
+        result = await fetch_physician_data(
             api_url=api_url,
             physician_name=request.search_term,
             search_type=request.search_type,
@@ -109,7 +117,7 @@ async def search_physician(request: PhysicianRequest):
                 detail=f"No physician found with {request.search_type} \"{request.search_term}\""
             )
             
-        return result
+        return ORJSONResponse(result)
     except Exception as e:
         logger.error(f"Error occurred: {str(e)}")
         if isinstance(e, HTTPException):
@@ -118,4 +126,13 @@ async def search_physician(request: PhysicianRequest):
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    dev = os.getenv("ENV") == "dev"
+    uvicorn.run(
+        "cms_calc:app",
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        workers=1 if dev else int(os.getenv("WEB_CONCURRENCY", os.cpu_count())),
+        reload=dev
+    )
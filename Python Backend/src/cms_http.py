@@ -0,0 +1,121 @@
+from contextlib import asynccontextmanager
+import httpx
+import ijson
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+from tenacity import AsyncRetrying, retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+# Statuses that are worth retrying against the CMS API
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+MAX_RETRIES = 3
+# Cap on a server-requested Retry-After, so one lookup can't hang for minutes
+MAX_RETRY_AFTER_SECONDS = 30
+
+def build_cms_session():
+    """
+    Session for the CMS data API with retries and a pool large enough for
+    gunicorn workers plus FastAPI's threadpool
+    """
+    retry_strategy = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=0.2,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD", "OPTIONS"])
+    )
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retry_strategy)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+# Shared across calls so the pooled connection to data.cms.gov is kept alive
+CMS_SESSION = build_cms_session()
+
+def build_cms_client():
+    """
+    Async client for the CMS data API; HTTP/2 lets concurrent lookups share
+    one connection as multiplexed streams
+    """
+    # Limits and HTTP/2 go on the transport, which httpx uses as-is once one is passed
+    return httpx.AsyncClient(
+        timeout=30,
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=64),
+            retries=MAX_RETRIES
+        )
+    )
+
+def _is_retryable(exc):
+    return isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code in RETRY_STATUSES
+
+_backoff = wait_exponential_jitter(initial=0.2, max=5)
+
+def _wait_for_cms(retry_state):
+    """
+    Wait as long as CMS asks via Retry-After, otherwise back off exponentially
+    """
+    exc = retry_state.outcome.exception()
+    retry_after = exc.response.headers.get("Retry-After") if isinstance(exc, httpx.HTTPStatusError) else None
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_RETRY_AFTER_SECONDS)
+        except ValueError:
+            # An HTTP date rather than seconds; not worth parsing
+            pass
+    return _backoff(retry_state)
+
+CMS_RETRY_POLICY = dict(
+    retry=retry_if_exception(_is_retryable),
+    wait=_wait_for_cms,
+    stop=stop_after_attempt(MAX_RETRIES + 1),
+    reraise=True
+)
+
+@retry(**CMS_RETRY_POLICY)
+async def cms_get(client, api_url, params):
+    """
+    GET from the CMS API, retrying on rate limiting and server errors
+    """
+    response = await client.get(api_url, params=params)
+    response.raise_for_status()
+    return response
+
+class _AsyncByteReader:
+    """
+    Minimal async file-like wrapper so ijson can pull from an httpx byte stream
+    """
+    def __init__(self, chunks):
+        self._chunks = chunks.__aiter__()
+
+    async def read(self, size=-1):
+        # ijson probes with read(0) to tell bytes from text
+        if size == 0:
+            return b""
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return b""
+
+async def _open_stream(client, api_url, params):
+    response = await client.send(client.build_request("GET", api_url, params=params), stream=True)
+    if response.is_error:
+        # Read the body so error handlers can log it; this also closes the stream
+        await response.aread()
+        response.raise_for_status()
+    return response
+
+@asynccontextmanager
+async def cms_stream_rows(client, api_url, params):
+    """
+    Stream a CMS API response and yield its rows one at a time as they are
+    parsed, with the same retries as cms_get
+    """
+    async for attempt in AsyncRetrying(**CMS_RETRY_POLICY):
+        with attempt:
+            response = await _open_stream(client, api_url, params)
+    try:
+        yield ijson.items_async(_AsyncByteReader(response.aiter_bytes()), "item", use_float=True)
+    finally:
+        await response.aclose()
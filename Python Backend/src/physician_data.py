@@ -1,27 +1,30 @@
-import requests
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from cms_http import cms_stream_rows
+from functools import lru_cache
+from types import MappingProxyType
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def fetch_physician_data(api_url, physician_name, state=None, search_type="name"):
+@lru_cache(maxsize=100_000)
+def _row_to_result(npi, first, last, benes, amt, state):
+    """
+    Response for a CMS row; cached because the same providers are looked up
+    again and again, and read-only because callers share the cached object
+    """
+    return MappingProxyType({
+        'name': f"{first} {last}",
+        'Tot_Benes': int(benes),
+        'Tot_Mdcr_Alowd_Amt': float(amt),
+        'NPI': npi,
+        'State': state
+    })
+
+async def fetch_physician_data(client, api_url, physician_name, state=None, search_type="name"):
     try:
-        logger.info(f"Searching by {search_type}: {physician_name} in state: {state}")
+        logger.debug("Searching by %s: %s in state: %s", search_type, physician_name, state)
         offset = 0
         page_size = 5000
-        timeout = 30
-
-        retry_strategy = Retry(
-            total=3,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS"]
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        http = requests.Session()
-        http.mount("https://", adapter)
-        http.mount("http://", adapter)
 
         params = {
             'size': page_size,
@@ -37,40 +40,47 @@ def fetch_physician_data(api_url, physician_name, state=None, search_type="name"
             else:
                 first_name, last_name = "", name_parts[0]
             params['filter[Rndrng_Prvdr_Last_Org_Name]'] = last_name
+            if first_name:
+                # Matching needs the exact first name, so let CMS filter on it too
+                params['filter[Rndrng_Prvdr_First_Name]'] = first_name
+                params['size'] = 50
 
         if state:
             params['filter[Rndrng_Prvdr_State_Abrvtn]'] = state.upper()
 
-        logger.info(f"Making API request with params: {params}")
-        response = http.get(api_url, params=params, timeout=timeout)
-        response.raise_for_status()
-        
-        data = response.json()
-        logger.info(f"Received {len(data) if data else 0} results")
-        
-        if not data:
-            return None
-        
-        for r in data:
-            if search_type == "npi":
-                matches = (r['Rndrng_NPI'] == physician_name and
-                         (not state or r.get('Rndrng_Prvdr_State_Abrvtn', '').upper() == state.upper()))
-            else:
-                matches = (r['Rndrng_Prvdr_Last_Org_Name'].lower() == last_name.lower() and
-                         r['Rndrng_Prvdr_First_Name'].lower() == first_name.lower() and
-                         (not state or r.get('Rndrng_Prvdr_State_Abrvtn', '').upper() == state.upper()))
+        logger.debug("Making API request with params: %s", params)
+
+        # Fold the search terms once rather than once per row
+        state_upper = state.upper() if state else None
+        if search_type != "npi":
+            last_cf = last_name.casefold()
+            first_cf = first_name.casefold()
+
+        # Rows are parsed as they arrive, so a match stops the download early
+        async with cms_stream_rows(client, api_url, params) as rows:
+            async for r in rows:
+                if search_type == "npi":
+                    matches = (r['Rndrng_NPI'] == physician_name and
+                             (not state_upper or r.get('Rndrng_Prvdr_State_Abrvtn', '').upper() == state_upper))
+                else:
+                    # CMS already filtered on last name, so nearly every row passes that test;
+                    # check the first name first so most rows are rejected after one casefold
+                    matches = (r['Rndrng_Prvdr_First_Name'].casefold() == first_cf and
+                             r['Rndrng_Prvdr_Last_Org_Name'].casefold() == last_cf and
+                             (not state_upper or r.get('Rndrng_Prvdr_State_Abrvtn', '').upper() == state_upper))
+
+                if matches:
+                    logger.debug("Found match: %s %s", r['Rndrng_Prvdr_First_Name'], r['Rndrng_Prvdr_Last_Org_Name'])
+                    return _row_to_result(
+                        r.get('Rndrng_NPI', 'N/A'),
+                        r['Rndrng_Prvdr_First_Name'],
+                        r['Rndrng_Prvdr_Last_Org_Name'],
+                        r.get('Tot_Benes', 0),
+                        r.get('Tot_Mdcr_Alowd_Amt', 0),
+                        r.get('Rndrng_Prvdr_State_Abrvtn', 'N/A')
+                    )
 
-            if matches:
-                logger.info(f"Found match: {r['Rndrng_Prvdr_First_Name']} {r['Rndrng_Prvdr_Last_Org_Name']}")
-                return {
-                    'name': f"{r['Rndrng_Prvdr_First_Name']} {r['Rndrng_Prvdr_Last_Org_Name']}",
-                    'Tot_Benes': int(r.get('Tot_Benes', 0)),
-                    'Tot_Mdcr_Alowd_Amt': float(r.get('Tot_Mdcr_Alowd_Amt', 0)),
-                    'NPI': r.get('Rndrng_NPI', 'N/A'),
-                    'State': r.get('Rndrng_Prvdr_State_Abrvtn', 'N/A')
-                }
-        
-        logger.info("No match found")
+        logger.debug("No match found")
         return None
 
     except Exception as e:
@@ -1,6 +1,4 @@
-import requests
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from cms_http import CMS_SESSION
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -19,16 +17,6 @@ def fetch_physician_data(api_url, physician_name, state=None):
         else:
             first_name, last_name = "", name_parts[0]
 
-        retry_strategy = Retry(
-            total=3,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS"]
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        http = requests.Session()
-        http.mount("https://", adapter)
-        http.mount("http://", adapter)
-
         params = {
             "filter[Rndrng_Prvdr_Last_Org_Name]": last_name,
             "size": page_size,
@@ -39,7 +27,7 @@ def fetch_physician_data(api_url, physician_name, state=None):
             params["filter[Rndrng_Prvdr_State_Abrvtn]"] = state.upper()
 
         logger.info(f"Making API request with params: {params}")
-        response = http.get(api_url, params=params, timeout=timeout)
+        response = CMS_SESSION.get(api_url, params=params, timeout=timeout)
         response.raise_for_status()
         
         data = response.json()
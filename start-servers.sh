@@ -17,7 +17,7 @@ check_port() {
 # Start the backend
 echo "Starting backend server..."
 cd "$BASE_DIR"
-python3 "$BASE_DIR/cms_calc.py" &
+ENV=dev python3 "$BASE_DIR/cms_calc.py" &
 BACKEND_PID=$!
 
 # Wait for backend to start